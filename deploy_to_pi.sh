@@ -55,7 +55,9 @@ ssh "$PI_HOST" << 'ENDSSH'
 cd /home/pi/picar/pi-server
 echo "Installing Python packages..."
 pip3 install -q Flask Flask-SocketIO python-socketio eventlet Pillow numpy 2>/dev/null || true
-pip3 install -q RPi.GPIO picamera2 simplejpeg 2>/dev/null || true
+pip3 install -q RPi.GPIO picamera2 2>/dev/null || true
+# Optional accelerators: installed separately so a failed build can't block the rest
+pip3 install -q simplejpeg PyTurboJPEG orjson numba || true
 echo "Dependencies installed"
 ENDSSH
 
@@ -5,15 +5,27 @@ Provides continuous MJPEG stream over HTTP
 
 import io
 import logging
+import os
 import time
-from threading import Thread, Event, Lock
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from threading import Thread, Event, Lock, Condition, local
 from typing import Generator
 import eventlet
+import eventlet.event
 import config
 
+# multipart/x-mixed-replace framing around each JPEG
+_BOUNDARY_HDR = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+_TAIL = b'\r\n'
+
+# V4L2 node of the Pi's hardware JPEG/H.264 codec, used by MJPEGEncoder
+_HW_CODEC_DEVICE = "/dev/video11"
+
 try:
     from picamera2 import Picamera2
-    from picamera2.encoders import JpegEncoder
+    from picamera2.encoders import JpegEncoder, MJPEGEncoder, Quality
     from picamera2.outputs import FileOutput
     PICAMERA2_AVAILABLE = True
 except ImportError:
@@ -21,28 +33,119 @@ except ImportError:
     logging.warning("picamera2 not available. Camera streaming disabled.")
 
 try:
-    from PIL import Image, ImageDraw, ImageFont
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from picamera2.request import MappedArray
+    MAPPED_ARRAY_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    MAPPED_ARRAY_AVAILABLE = False
+
+try:
+    from PIL import Image, ImageDraw
     PILLOW_AVAILABLE = True
 except ImportError:
     PILLOW_AVAILABLE = False
 
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_420
+    TURBOJPEG_AVAILABLE = True
+except ImportError:
+    TURBOJPEG_AVAILABLE = False
+
+
+def _pack_i420(frame, width: int, height: int):
+    """
+    Repack a stride-padded I420 frame into the layout libjpeg-turbo reads
+
+    PyTurboJPEG assumes plane rows padded to 4 bytes, so the ISP's wider
+    row padding would otherwise be encoded as extra image columns.
+
+    Args:
+        frame: (height * 3 / 2, stride) uint8 array, Y then U then V
+        width: Visible image width
+        height: Image height
+
+    Returns:
+        Flat uint8 array of the repacked planes
+    """
+    stride = frame.shape[1]
+    y_pitch = (width + 3) & ~3
+    c_pitch = (width // 2 + 3) & ~3
+    flat = frame.reshape(-1)
+    y_plane = flat[:height * stride].reshape(height, stride)[:, :y_pitch]
+    # U and V rows (height / 2 each) are half the stride wide
+    c_planes = flat[height * stride:].reshape(height, stride // 2)[:, :c_pitch]
+    return np.concatenate((y_plane.ravel(), c_planes.ravel()))
+
 
 class StreamingOutput(io.BufferedIOBase):
     """
     Output class that buffers JPEG frames for streaming
+
+    Consumers wait on `condition` until `frame_id` moves past the last id
+    they saw, so no frame is missed or handed out twice.
     """
 
     def __init__(self):
         self.frame = None
-        self.condition = Event()
+        self.frame_id = 0
+        self.condition = Condition()
 
     def write(self, buf):
         """Write frame data to buffer"""
-        self.frame = buf
-        self.condition.set()
+        with self.condition:
+            self.frame = buf
+            self.frame_id += 1
+            self.condition.notify_all()
         return len(buf)
 
 
+class FrameCache:
+    """
+    Latest encoded frame of one stream, shared by every client
+
+    Exactly one producer thread publishes into a cache; consumers on the
+    eventlet hub read `latest` without locking (the tuple is immutable and
+    rebinding it is atomic) and block in wait() until the next announce.
+    """
+
+    def __init__(self):
+        self.latest = (0, None, None)  # (frame_id, jpeg, mjpeg_part)
+        self._seq = 0  # written by the producer only
+        self._announced_id = 0
+        self._new_frame = eventlet.event.Event()
+
+    def publish(self, jpeg_buffer: bytes):
+        """Store a newly encoded frame (producer thread)"""
+        # Frame the part once here rather than once per client per frame
+        mjpeg_part = _BOUNDARY_HDR + jpeg_buffer + _TAIL
+        self._seq += 1
+        self.latest = (self._seq, jpeg_buffer, mjpeg_part)
+
+    def clear(self):
+        """Drop the cached frame so the next client doesn't get a stale one"""
+        # Runs on the hub, concurrently with publish(). The id comes from
+        # the producer's counter, so even if a publish lands in between,
+        # the next one still gets an id newer than any announced.
+        self.latest = (self._seq, None, None)
+
+    def announce(self):
+        """Wake waiting consumers if a new frame was published (hub only)"""
+        frame_id = self.latest[0]
+        if frame_id != self._announced_id:
+            self._announced_id = frame_id
+            event, self._new_frame = self._new_frame, eventlet.event.Event()
+            event.send(frame_id)
+
+    def wait(self, timeout: float = None):
+        """Block the calling greenthread until the next frame is announced"""
+        return self._new_frame.wait(timeout=timeout)
+
+
 class CameraStream:
     """
     Manages Raspberry Pi camera and provides MJPEG streaming
@@ -56,13 +159,62 @@ class CameraStream:
         self.is_initialized = False
         self.is_streaming = False
 
-        # For multi-client support
-        self.current_frame = None
-        self.frame_lock = Lock()
-        self.frame_counter = 0
+        # For multi-client support: one shared frame cache per stream
+        self.frames = {"main": FrameCache(), "lores": FrameCache()}
+        self.frame_lock = Lock()  # guards client bookkeeping
+        self._publish_lock = Lock()  # serializes encode-pool completions
+        self._published_seq = {"main": 0, "lores": 0}
+        self._encode_pool = None
         self.capture_thread = None
+        self.lores_thread = None
         self.client_count = 0
+        self.stream_clients = {"main": 0, "lores": 0}
         self.next_client_id = 0
+        self._has_clients = Event()  # capture thread idles while clear
+        self._stream_wanted = {"main": Event(), "lores": Event()}
+
+        # New-frame notification: the capture thread writes a byte to a pipe,
+        # a relay greenthread drains it and announces every frame cache
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._relay = None
+
+        # picamera2 encoder pipeline (CAMERA_ENCODER "hardware" or "picamera2")
+        self.use_encoder = PICAMERA2_AVAILABLE and config.CAMERA_ENCODER in ("hardware", "picamera2")
+        self.encoder = self._create_encoder() if self.use_encoder else None
+
+        # libjpeg-turbo encoder (SIMD-accelerated), shared across frames
+        self._tj = None
+        if TURBOJPEG_AVAILABLE:
+            try:
+                self._tj = TurboJPEG()
+            except Exception as e:
+                self.logger.warning(f"libjpeg-turbo not usable, falling back to Pillow: {e}")
+
+        # Visible width of each YUV420 stream, filled in once configured
+        self._yuv_widths = {}
+
+        # Per-thread scratch buffer reused by the Pillow encoder
+        self._enc_local = local()
+
+        # JPEG works in YCbCr 4:2:0, so ask the ISP for planar YUV420 whenever
+        # the encoder can take it and skip the RGB round trip entirely. The
+        # pinned picamera2's JpegEncoder has no YUV420 support, only RGBX.
+        if self.use_encoder:
+            self.capture_format = "YUV420" if isinstance(self.encoder, MJPEGEncoder) else "XBGR8888"
+        elif self._tj is not None:
+            self.capture_format = "YUV420"
+        else:
+            self.capture_format = "RGB888"
+
+        # The ISP's lores output is always YUV420, so it needs libjpeg-turbo
+        self.lores_enabled = config.CAMERA_LORES_RESOLUTION is not None and self._tj is not None
+        if config.CAMERA_LORES_RESOLUTION is not None and not self.lores_enabled:
+            self.logger.warning("Low-res stream needs libjpeg-turbo - serving full resolution only")
+
+        # Encoded once; served to every client while the camera is down
+        self._placeholder_mjpeg_chunk = self._build_placeholder()
 
         if PICAMERA2_AVAILABLE:
             self._initialize_camera()
@@ -83,11 +235,24 @@ class CameraStream:
             camera_config = self.camera.create_video_configuration(
                 main={
                     "size": config.CAMERA_RESOLUTION,
-                    "format": "RGB888"
-                }
+                    "format": self.capture_format
+                },
+                lores={
+                    "size": config.CAMERA_LORES_RESOLUTION,
+                    "format": "YUV420"
+                } if self.lores_enabled else None,
+                controls={"FrameRate": config.CAMERA_FRAMERATE}
             )
             self.camera.configure(camera_config)
 
+            # Visible widths of the planar YUV420 streams, whose mapped
+            # ISP buffers are encoded in place with their row padding
+            self._yuv_widths = {}
+            for stream in ("main", "lores"):
+                stream_config = self.camera.camera_config.get(stream)
+                if stream_config and stream_config["format"] == "YUV420":
+                    self._yuv_widths[stream] = stream_config["size"][0]
+
             # Apply rotation and flip settings
             if config.CAMERA_HFLIP or config.CAMERA_VFLIP:
                 transform = {
@@ -116,148 +281,464 @@ class CameraStream:
             return
 
         self.is_streaming = True
-        self.capture_thread = Thread(target=self._capture_frames, daemon=True)
+
+        if self.use_encoder:
+            # Let picamera2 encode frames as they leave the ISP
+            self.output = StreamingOutput()
+            target = self._capture_encoded_frames
+
+            # The encoder only covers main; lores gets its own capture loop
+            if self.lores_enabled:
+                self.lores_thread = Thread(target=self._capture_lores_frames, daemon=True)
+                self.lores_thread.start()
+        else:
+            # Encode on worker threads so the next capture overlaps the encode
+            self._encode_pool = ThreadPoolExecutor(
+                max_workers=config.JPEG_ENCODE_THREADS,
+                thread_name_prefix="jpeg-encode",
+                initializer=self._reset_worker_scheduling
+            )
+            target = self._capture_frames
+
+        self.capture_thread = Thread(target=target, daemon=True)
         self.capture_thread.start()
         self.logger.info("Background frame capture started (multi-client support enabled)")
 
-    def _capture_frames(self):
-        """Background thread that continuously captures frames"""
-        frame_time = 1.0 / config.CAMERA_FRAMERATE
+    def _create_encoder(self):
+        """
+        Create the picamera2 encoder for the configured pipeline
+
+        Returns:
+            MJPEGEncoder (V4L2 hardware codec) when requested and available,
+            otherwise JpegEncoder (libjpeg-turbo on the CPU)
+        """
+        if config.CAMERA_ENCODER == "hardware":
+            # MJPEGEncoder only opens the codec once started, so probe for
+            # the device up front (the Pi 5 has no hardware JPEG codec)
+            if os.path.exists(_HW_CODEC_DEVICE):
+                self.logger.info("Using hardware MJPEG encoder")
+                return MJPEGEncoder()
+            self.logger.warning("Hardware MJPEG encoder unavailable (no %s), using JpegEncoder", _HW_CODEC_DEVICE)
+
+        return JpegEncoder(q=config.JPEG_QUALITY)
+
+    @staticmethod
+    def _encoder_quality():
+        """Map JPEG_QUALITY (0-100) onto picamera2's encoder Quality levels"""
+        if config.JPEG_QUALITY < 35:
+            return Quality.VERY_LOW
+        if config.JPEG_QUALITY < 55:
+            return Quality.LOW
+        if config.JPEG_QUALITY < 75:
+            return Quality.MEDIUM
+        if config.JPEG_QUALITY < 90:
+            return Quality.HIGH
+        return Quality.VERY_HIGH
+
+    def _capture_encoded_frames(self):
+        """Background thread that publishes frames from the picamera2 encoder"""
         frame_count = 0
+        last_output_id = 0
 
-        self.logger.info("Frame capture thread running")
+        # Not tuned: picamera2 starts its encoder threads from this thread
+        # and they would inherit its CPU pinning and priority
+        self.logger.info("Frame capture thread running (%s)", type(self.encoder).__name__)
 
         try:
             while self.is_streaming:
-                start_time = time.time()
+                # Only run the encoder while someone is watching
+                if not self._stream_wanted["main"].wait(timeout=1.0):
+                    continue
+
+                # Quality picks the MJPEGEncoder bitrate. JpegEncoder would
+                # replace its q with the preset's, so it gets None.
+                quality = self._encoder_quality() if isinstance(self.encoder, MJPEGEncoder) else None
+                self.camera.start_encoder(self.encoder, FileOutput(self.output), quality=quality)
+                self.logger.debug("Encoder started")
+                try:
+                    while self.is_streaming and self._stream_wanted["main"].is_set():
+                        # Wait for the encoder to deliver the next JPEG
+                        with self.output.condition:
+                            if not self.output.condition.wait_for(
+                                lambda: self.output.frame_id > last_output_id,
+                                timeout=1.0
+                            ):
+                                continue
+                            last_output_id = self.output.frame_id
+                            jpeg_buffer = self.output.frame
+
+                        # Store frame for all clients
+                        self._publish_frame(jpeg_buffer, "main")
+
+                        frame_count += 1
+                        if frame_count % 100 == 0 and self.logger.isEnabledFor(logging.DEBUG):
+                            self.logger.debug("Captured %d frames, %d clients connected", frame_count, self.client_count)
+                finally:
+                    self.camera.stop_encoder()
+                    self.logger.debug("Encoder stopped (no clients)")
 
-                # Capture frame
-                frame = self.camera.capture_array()
+        except Exception as e:
+            self.logger.error("Error in frame capture thread: %s", e, exc_info=True)
+        finally:
+            self.logger.info("Frame capture thread stopped after %d frames", frame_count)
 
-                # Convert to JPEG
-                jpeg_buffer = self._encode_jpeg(frame)
+    def _tune_capture_thread(self):
+        """
+        Apply the configured CPU affinity and scheduling priority
 
-                # Store frame for all clients
-                with self.frame_lock:
-                    self.current_frame = jpeg_buffer
-                    self.frame_counter += 1
+        Must be called from the capture thread itself: on Linux, pid 0 in
+        the sched_* calls (and os.nice) refers to the calling thread.
+        """
+        if config.CAMERA_THREAD_CPU is not None and hasattr(os, 'sched_setaffinity'):
+            try:
+                os.sched_setaffinity(0, {config.CAMERA_THREAD_CPU})
+                self.logger.info("Capture thread pinned to CPU %d", config.CAMERA_THREAD_CPU)
+            except OSError as e:
+                self.logger.warning("Could not pin capture thread to CPU %d: %s", config.CAMERA_THREAD_CPU, e)
+
+        if config.CAMERA_THREAD_PRIORITY is not None:
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(config.CAMERA_THREAD_PRIORITY))
+                self.logger.info("Capture thread running SCHED_FIFO priority %d", config.CAMERA_THREAD_PRIORITY)
+            except (AttributeError, OSError) as e:
+                self.logger.warning("SCHED_FIFO not permitted (%s), trying nice -5", e)
+                try:
+                    os.nice(-5)
+                except OSError as e:
+                    self.logger.warning("Could not raise capture thread priority: %s", e)
+
+    @staticmethod
+    def _reset_worker_scheduling():
+        """
+        Undo the capture thread's tuning in a newly started encode worker
+
+        Workers are spawned lazily by the capture thread and inherit its
+        affinity and policy; the encodes should spread across the cores not
+        pinned to the capture and server threads.
+        """
+        try:
+            if hasattr(os, 'sched_setaffinity'):
+                cpus = set(range(os.cpu_count() or 1))
+                free = cpus - {config.CAMERA_THREAD_CPU, config.SERVER_THREAD_CPU}
+                os.sched_setaffinity(0, free or cpus)
+            if config.CAMERA_THREAD_PRIORITY is not None:
+                os.sched_setscheduler(0, os.SCHED_OTHER, os.sched_param(0))
+                os.setpriority(os.PRIO_PROCESS, 0, 0)
+        except (AttributeError, OSError) as e:
+            logging.getLogger(__name__).warning("Could not reset encode worker scheduling: %s", e)
+
+    def _capture_lores_frames(self):
+        """Background thread that encodes the lores stream in encoder mode"""
+        self.logger.info("Low-res capture thread running")
 
+        try:
+            while self.is_streaming:
+                if not self._stream_wanted["lores"].wait(timeout=1.0):
+                    continue
+
+                # Paced by the camera: capture_request waits for the next frame
+                request = self.camera.capture_request()
+                jpeg_buffer = self._encode_request(request, "lores")
+                if jpeg_buffer:
+                    self._publish_frame(jpeg_buffer, "lores")
+
+        except Exception as e:
+            self.logger.error("Error in low-res capture thread: %s", e, exc_info=True)
+
+    def _capture_frames(self):
+        """Background thread that continuously captures frames"""
+        frame_time = 1.0 / config.CAMERA_FRAMERATE
+        frame_count = 0
+        in_flight = deque()
+
+        self.logger.info("Frame capture thread running")
+        self._tune_capture_thread()
+
+        try:
+            # Fixed monotonic schedule: encode-time variance doesn't accumulate
+            next_deadline = time.monotonic()
+
+            while self.is_streaming:
+                # Don't capture or encode while nobody is watching
+                if not self._has_clients.wait(timeout=1.0):
+                    continue
+
+                # Bound the encode queue so latency (and the number of
+                # camera buffers held by encodes) can't run away. wait()
+                # doesn't re-raise, so a failed encode can't stop capture.
+                while len(in_flight) >= config.JPEG_ENCODE_THREADS:
+                    wait((in_flight.popleft(),))
+
+                # Capture both streams from the same request
+                streams = []
+                if self._stream_wanted["main"].is_set():
+                    streams.append("main")
+                if self.lores_enabled and self._stream_wanted["lores"].is_set():
+                    streams.append("lores")
+
+                # Convert to JPEG on the pool; the callback publishes it.
+                # Each encode holds its own reference to the request.
                 frame_count += 1
-                if frame_count % 100 == 0:
-                    self.logger.debug(f"Captured {frame_count} frames, {self.client_count} clients connected")
+                request = self.camera.capture_request()
+                try:
+                    for stream in streams:
+                        request.acquire()
+                        future = self._encode_pool.submit(self._encode_request, request, stream)
+                        future.add_done_callback(partial(self._on_frame_encoded, stream, frame_count))
+                        in_flight.append(future)
+                finally:
+                    request.release()
+
+                if frame_count % 100 == 0 and self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug("Captured %d frames, %d clients connected", frame_count, self.client_count)
 
                 # Maintain frame rate
-                elapsed = time.time() - start_time
-                sleep_time = max(0, frame_time - elapsed)
+                next_deadline += frame_time
+                sleep_time = next_deadline - time.monotonic()
                 if sleep_time > 0:
                     time.sleep(sleep_time)
+                else:
+                    # Fell behind (or just woke from idle) - don't try to catch up
+                    next_deadline = time.monotonic()
 
         except Exception as e:
-            self.logger.error(f"Error in frame capture thread: {e}", exc_info=True)
+            self.logger.error("Error in frame capture thread: %s", e, exc_info=True)
         finally:
-            self.logger.info(f"Frame capture thread stopped after {frame_count} frames")
+            self.logger.info("Frame capture thread stopped after %d frames", frame_count)
+
+    def _encode_request(self, request, stream: str) -> bytes:
+        """
+        Encode one stream of a captured request, then release the request
+
+        YUV420 streams are encoded straight from the mapped ISP buffer,
+        without the numpy copy make_array would take.
 
-    def generate_frames(self) -> Generator[bytes, None, None]:
+        Args:
+            request: picamera2 CompletedRequest (one reference is consumed)
+            stream: "main" or "lores"
+
+        Returns:
+            JPEG encoded bytes (empty if the frame could not be read)
+        """
+        try:
+            width = self._yuv_widths.get(stream)
+            if MAPPED_ARRAY_AVAILABLE and width is not None:
+                # MappedArray shapes YUV420 as (height * 3 / 2, stride). Only
+                # the encoder sees the view, so none outlives the mapping.
+                with MappedArray(request, stream) as mapped:
+                    return self._encode_jpeg(mapped.array, width)
+            return self._encode_jpeg(request.make_array(stream), self._yuv_widths.get(stream))
+        except Exception as e:
+            self.logger.error("Error encoding %s frame: %s", stream, e)
+            return b''
+        finally:
+            request.release()
+
+    def _on_frame_encoded(self, stream: str, seq: int, future):
+        """Encode-pool callback: publish the frame unless a newer one won"""
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.logger.error("Encode worker failed on %s frame %d: %s", stream, seq, future.exception())
+            return
+        jpeg_buffer = future.result()
+        with self._publish_lock:
+            if not jpeg_buffer or seq <= self._published_seq[stream]:
+                return
+            self._published_seq[stream] = seq
+            self._publish_frame(jpeg_buffer, stream)
+
+    def _publish_frame(self, jpeg_buffer: bytes, stream: str = "main"):
+        """Make a newly encoded frame the latest one and wake clients"""
+        self.frames[stream].publish(jpeg_buffer)
+        self._notify_frame()
+
+    def _notify_frame(self):
+        """Signal from the capture thread that a new frame was published"""
+        try:
+            os.write(self._wake_w, b'\0')
+        except BlockingIOError:
+            pass  # Pipe full: the relay already has a wakeup pending
+
+    def _relay_frames(self):
+        """Greenthread that turns capture-thread signals into client wakeups"""
+        while True:
+            eventlet.hubs.trampoline(self._wake_r, read=True)
+            try:
+                os.read(self._wake_r, 4096)
+            except BlockingIOError:
+                pass
+            for cache in self.frames.values():
+                cache.announce()
+
+    def _add_client(self, stream: str = "main") -> int:
+        """Register a frame consumer and wake the capture thread"""
+        with self.frame_lock:
+            self.next_client_id += 1
+            self.client_count += 1
+            self.stream_clients[stream] += 1
+            self._stream_wanted[stream].set()
+            self._has_clients.set()
+            return self.next_client_id
+
+    def _remove_client(self, stream: str = "main"):
+        """Unregister a frame consumer, idling capture when none remain"""
+        with self.frame_lock:
+            self.client_count -= 1
+            self.stream_clients[stream] -= 1
+            if self.stream_clients[stream] == 0:
+                self._stream_wanted[stream].clear()
+                # Don't greet the next client with a stale frame
+                self.frames[stream].clear()
+            if self.client_count == 0:
+                self._has_clients.clear()
+
+    def generate_frames(self, stream: str = "main") -> Generator[bytes, None, None]:
         """
         Generator that yields MJPEG frames for streaming
         Serves frames from shared buffer - supports multiple clients
 
+        Args:
+            stream: "main" for full resolution, "lores" for the low-res
+                    preview (falls back to "main" when unavailable)
+
         Yields:
             JPEG frame data with multipart headers
         """
+        if stream != "main" and not self.lores_enabled:
+            stream = "main"
+
         # Assign unique client ID and increment counter
-        with self.frame_lock:
-            self.next_client_id += 1
-            client_id = self.next_client_id
-            self.client_count += 1
+        client_id = self._add_client(stream)
 
-        self.logger.info(f"Client #{client_id} connected (total clients: {self.client_count})")
+        self.logger.info("Client #%d connected (total clients: %d)", client_id, self.client_count)
 
         if not self.is_initialized:
             self.logger.error("Camera not initialized")
             # Return a placeholder image
             yield self._generate_placeholder_frame()
-            with self.frame_lock:
-                self.client_count -= 1
+            self._remove_client(stream)
             return
 
-        frame_time = 1.0 / config.CAMERA_FRAMERATE
-        self.logger.info(f"Client #{client_id} streaming at {config.CAMERA_FRAMERATE}fps")
+        # Relay runs in the hub of whichever thread serves the clients
+        if self._relay is None:
+            self._relay = eventlet.spawn(self._relay_frames)
+
+        self.logger.info("Client #%d streaming %s at %dfps", client_id, stream, config.CAMERA_FRAMERATE)
+
+        cache = self.frames[stream]
 
         try:
             frame_count = 0
             last_frame_id = -1
 
             while True:
-                with self.frame_lock:
-                    current_frame = self.current_frame
-                    current_frame_id = self.frame_counter
+                current_frame_id, _, current_part = cache.latest
 
-                if current_frame and current_frame_id != last_frame_id:
-                    yield (
-                        b'--frame\r\n'
-                        b'Content-Type: image/jpeg\r\n\r\n' + current_frame + b'\r\n'
-                    )
+                if current_part and current_frame_id != last_frame_id:
+                    yield current_part
 
                     last_frame_id = current_frame_id
                     frame_count += 1
 
-                    if frame_count % 100 == 0:
-                        self.logger.debug(f"Client #{client_id} streamed {frame_count} frames")
+                    if frame_count % 100 == 0 and self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug("Client #%d streamed %d frames", client_id, frame_count)
+
+                    # A newer frame may have landed while this one was sent
+                    continue
 
-                # Yield to the eventlet scheduler to allow other clients to run
-                eventlet.sleep(frame_time / 2)
+                # Sleep until the relay signals the next frame of this
+                # stream. Greenthreads are cooperative, so the relay can't
+                # fire between the check above and this wait.
+                cache.wait(timeout=1.0)
 
         except GeneratorExit:
-            self.logger.info(f"Client #{client_id} disconnected normally")
+            self.logger.info("Client #%d disconnected normally", client_id)
         except Exception as e:
-            self.logger.error(f"Client #{client_id} error: {e}", exc_info=True)
+            self.logger.error("Client #%d error: %s", client_id, e, exc_info=True)
         finally:
-            with self.frame_lock:
-                self.client_count -= 1
-            self.logger.info(f"Client #{client_id} stopped after {frame_count} frames (remaining clients: {self.client_count})")
+            self._remove_client(stream)
+            self.logger.info(
+                "Client #%d stopped after %d frames (remaining clients: %d)",
+                client_id, frame_count, self.client_count
+            )
 
-    def _encode_jpeg(self, frame) -> bytes:
+    def _encode_jpeg(self, frame, width: int = None) -> bytes:
         """
         Encode frame as JPEG
 
         Args:
-            frame: Numpy array of image data
+            frame: Numpy array of image data (planar YUV420, or packed RGB
+                   when capture_format is RGB888)
+            width: Visible width of a YUV420 frame whose rows may be padded
+                   (None for packed RGB frames)
 
         Returns:
             JPEG encoded bytes
         """
         try:
-            # Convert numpy array to PIL Image
-            if PILLOW_AVAILABLE:
-                image = Image.fromarray(frame)
-
-                # Encode to JPEG
-                buffer = io.BytesIO()
+            if width is not None:
+                # Planar I420 (Y plane followed by U and V): libjpeg-turbo
+                # compresses it without any colour conversion
+                height = frame.shape[0] * 2 // 3
+                stride = frame.shape[1]
+                if stride != (width + 3) & ~3 or stride // 2 != (width // 2 + 3) & ~3:
+                    # Row padding beyond what libjpeg-turbo expects: drop it
+                    frame = _pack_i420(frame, width, height)
+                return self._tj.encode_from_yuv(
+                    frame,
+                    height,
+                    width,
+                    quality=config.JPEG_QUALITY,
+                    jpeg_subsample=TJSAMP_420
+                )
+            elif PILLOW_AVAILABLE:
+                # Wrap the numpy buffer directly instead of going through
+                # the array interface. RGB888 frames are B,G,R in memory.
+                if not frame.flags['C_CONTIGUOUS']:
+                    frame = np.ascontiguousarray(frame)
+                height, width = frame.shape[:2]
+                image = Image.frombuffer('RGB', (width, height), frame, 'raw', 'BGR', 0, 1)
+
+                # Encode into this thread's reusable buffer
+                buffer = getattr(self._enc_local, 'buffer', None)
+                if buffer is None:
+                    buffer = self._enc_local.buffer = io.BytesIO()
+                buffer.seek(0)
+                buffer.truncate()
                 image.save(buffer, format='JPEG', quality=config.JPEG_QUALITY)
                 return buffer.getvalue()
             else:
                 # Fallback: use simple encoding if PIL not available
                 # This is less efficient but works
                 import cv2
-                import numpy as np
+                # RGB888 frames are already B,G,R in memory, as OpenCV expects
                 encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), config.JPEG_QUALITY]
                 _, jpeg = cv2.imencode('.jpg', frame, encode_param)
                 return jpeg.tobytes()
 
         except Exception as e:
-            self.logger.error(f"Error encoding JPEG: {e}")
+            self.logger.error("Error encoding JPEG: %s", e)
             return b''
 
     def _generate_placeholder_frame(self) -> bytes:
         """
-        Generate a placeholder image when camera is not available
+        Get the placeholder image shown when camera is not available
+
+        Returns:
+            MJPEG formatted placeholder frame
+        """
+        return self._placeholder_mjpeg_chunk
+
+    def _build_placeholder(self) -> bytes:
+        """
+        Render and encode the "Camera Not Available" placeholder
 
         Returns:
             MJPEG formatted placeholder frame
         """
         if not PILLOW_AVAILABLE:
-            return b'--frame\r\nContent-Type: image/jpeg\r\n\r\n\r\n'
+            return _BOUNDARY_HDR + _TAIL
 
         try:
             # Create black image with text
@@ -277,14 +758,11 @@ class CameraStream:
             img.save(buffer, format='JPEG', quality=80)
             jpeg_data = buffer.getvalue()
 
-            return (
-                b'--frame\r\n'
-                b'Content-Type: image/jpeg\r\n\r\n' + jpeg_data + b'\r\n'
-            )
+            return _BOUNDARY_HDR + jpeg_data + _TAIL
 
         except Exception as e:
             self.logger.error(f"Error generating placeholder: {e}")
-            return b'--frame\r\nContent-Type: image/jpeg\r\n\r\n\r\n'
+            return _BOUNDARY_HDR + _TAIL
 
     def get_test_frame(self) -> bytes:
         """
@@ -296,9 +774,24 @@ class CameraStream:
         if not self.is_initialized:
             return b''
 
+        if self.use_encoder:
+            # Frames are already encoded by picamera2; act as a client
+            # until the encoder hands one over
+            self._add_client()
+            try:
+                deadline = time.time() + 2.0
+                while time.time() < deadline:
+                    _, current_frame, _ = self.frames["main"].latest
+                    if current_frame:
+                        return current_frame
+                    time.sleep(0.05)
+                return b''
+            finally:
+                self._remove_client()
+
         try:
             frame = self.camera.capture_array()
-            return self._encode_jpeg(frame)
+            return self._encode_jpeg(frame, self._yuv_widths.get("main"))
         except Exception as e:
             self.logger.error(f"Error capturing test frame: {e}")
             return b''
@@ -313,6 +806,12 @@ class CameraStream:
         if self.camera is not None:
             try:
                 self.stop_streaming()
+                # Let the capture threads stop the encoder before the camera
+                for thread in (self.capture_thread, self.lores_thread):
+                    if thread is not None:
+                        thread.join(timeout=2.0)
+                if self._encode_pool is not None:
+                    self._encode_pool.shutdown(wait=True)
                 self.camera.stop()
                 self.camera.close()
                 self.logger.info("Camera cleaned up")
@@ -3,8 +3,12 @@ Car Controller - GPIO-based motor control for Raspberry Pi car
 Handles motor control based on joystick input coordinates
 """
 
+import os
+import mmap
+import array
 import time
 import logging
+from functools import lru_cache
 from typing import Tuple
 import config
 
@@ -15,6 +19,116 @@ except (ImportError, RuntimeError):
     GPIO_AVAILABLE = False
     logging.warning("RPi.GPIO not available. Running in simulation mode.")
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(**kwargs):
+        """Leave the function as plain Python when Numba isn't installed"""
+        return lambda func: func
+
+# BCM2835 GPIO register offsets (bank 0, GPIO 0-31) within /dev/gpiomem
+GPSET0 = 0x1C
+GPCLR0 = 0x28
+
+# Same registers as indexes into a 32-bit word view of the mapping
+GPSET0_WORD = GPSET0 // 4
+GPCLR0_WORD = GPCLR0 // 4
+
+# SoCs sharing the BCM2835 GPIO register layout (Pi 5's RP1 differs)
+BCM2835_FAMILY = (b"brcm,bcm2835", b"brcm,bcm2836", b"brcm,bcm2837", b"brcm,bcm2711")
+
+# Integer-nanosecond monotonic clock: immune to wall-clock steps (NTP)
+_mono = time.monotonic_ns
+
+
+@njit(cache=True)
+def _mix_drive(a, b, dead_zone, pwm_lut, dual):
+    """
+    Turn raw drive input into (left_dir, left_pwm, right_dir, right_pwm)
+
+    With dual set, a/b are the left/right motor values; otherwise they are
+    joystick x/y and get the per-axis dead zone plus differential mixing.
+    Both directions come back 0 when the motors should stop.
+    """
+    a = max(-1.0, min(1.0, a))
+    b = max(-1.0, min(1.0, b))
+
+    if dual:
+        left = a
+        right = b
+    else:
+        # Apply axis-specific dead zones to avoid unintended drift
+        if abs(a) < dead_zone:
+            a = 0.0
+        if abs(b) < dead_zone:
+            b = 0.0
+        if a == 0.0 and b == 0.0:
+            return 0, 0, 0, 0
+        # Positive x (right) reduces left motor and increases right motor
+        left = b - a
+        right = b + a
+
+    # Quantize to hundredths so speeds index straight into the PWM table
+    left_index = max(-100, min(100, round(left * 100)))
+    right_index = max(-100, min(100, round(right * 100)))
+    left_pwm = pwm_lut[left_index + 100]
+    right_pwm = pwm_lut[right_index + 100]
+
+    left_dir = (left_index > 0) - (left_index < 0)
+    right_dir = (right_index > 0) - (right_index < 0)
+    if dual:
+        # Dead zone is baked into the table: a zero duty means that motor stops
+        if left_pwm == 0:
+            left_dir = 0
+        if right_pwm == 0:
+            right_dir = 0
+    return left_dir, left_pwm, right_dir, right_pwm
+
+
+class _SysfsPWM:
+    """
+    Hardware PWM channel driven through /sys/class/pwm
+
+    Mirrors the parts of RPi.GPIO's PWM object the controller uses
+    (start, ChangeDutyCycle, stop) so the two are interchangeable.
+    """
+
+    def __init__(self, chip: int, channel: int, frequency: int):
+        base = f"/sys/class/pwm/pwmchip{chip}"
+        self._path = f"{base}/pwm{channel}"
+        if not os.path.isdir(self._path):
+            with open(f"{base}/export", "w") as f:
+                f.write(str(channel))
+            # udev needs a moment to set permissions on the new channel
+            for _ in range(50):
+                if os.access(f"{self._path}/period", os.W_OK):
+                    break
+                time.sleep(0.01)
+
+        self._period = 1_000_000_000 // frequency
+        # Duty must never exceed the period, so zero it before resizing
+        self._write("duty_cycle", 0)
+        self._write("period", self._period)
+        self._duty_fd = os.open(f"{self._path}/duty_cycle", os.O_WRONLY)
+
+    def _write(self, name: str, value: int):
+        with open(f"{self._path}/{name}", "w") as f:
+            f.write(str(value))
+
+    def start(self, duty: float):
+        self.ChangeDutyCycle(duty)
+        self._write("enable", 1)
+
+    def ChangeDutyCycle(self, duty: float):
+        os.pwrite(self._duty_fd, b"%d" % (self._period * duty // 100), 0)
+
+    def stop(self):
+        self._write("enable", 0)
+        os.close(self._duty_fd)
+
 
 class CarController:
     """
@@ -30,7 +144,64 @@ class CarController:
         self.is_initialized = False
         self.pwm_a = None
         self.pwm_b = None
-        self.last_command_time = time.time()
+        self.last_command_time = _mono()  # monotonic ns
+
+        # Snapshot config values used on every command
+        self._dead_zone = config.JOYSTICK_DEAD_ZONE
+        self._min_pwm = config.MIN_MOTOR_SPEED
+        self._pwm_range = config.MAX_MOTOR_SPEED - config.MIN_MOTOR_SPEED
+        self._a_pin1, self._a_pin2 = config.MOTOR_A_PIN1, config.MOTOR_A_PIN2
+        self._b_pin1, self._b_pin2 = config.MOTOR_B_PIN1, config.MOTOR_B_PIN2
+        self._a_pins = (self._a_pin1, self._a_pin2)
+        self._b_pins = (self._b_pin1, self._b_pin2)
+        self._a_inv = config.MOTOR_A_INVERTED
+        self._b_inv = config.MOTOR_B_INVERTED
+        self._watchdog_enabled = config.ENABLE_WATCHDOG
+        self._auto_stop_timeout_ns = int(config.AUTO_STOP_TIMEOUT * 1_000_000_000)
+        self._logger_debug = self.logger.debug
+        # Duty change worth half the dead zone, in PWM percent
+        self._coalesce_pwm_delta = config.JOYSTICK_DEAD_ZONE / 2 * self._pwm_range
+        self._coalesce_window_ns = int(config.COMMAND_COALESCE_WINDOW * 1_000_000_000)
+
+        # (direction, duty) each motor is driven at, and when process_*
+        # last drove them (monotonic ns)
+        self._a_state = (0, 0)
+        self._b_state = (0, 0)
+        self._applied_at = 0
+
+        # Memory-mapped GPIO registers and per-motor (set_mask, clr_mask)
+        # actions indexed by direction + 1 (only when GPIO_USE_MMAP works)
+        self._gpio_mem = None
+        self._gpio_regs = None  # uint32 memoryview over _gpio_mem
+        self._a_actions = None
+        self._b_actions = None
+
+        # Last duty written to each PWM channel (-1 forces the first write)
+        self._last_duty_a = -1
+        self._last_duty_b = -1
+
+        # RPi.GPIO fallback: (PIN1, PIN2) levels indexed by direction + 1
+        self._a_levels = None
+        self._b_levels = None
+
+        # PWM duty per integer speed percentage 0-100, dead zone folded in
+        self._pwm_table = array.array('B', (
+            0 if i / 100 < self._dead_zone else self._min_pwm + i * self._pwm_range // 100
+            for i in range(101)
+        ))
+
+        # Signed variant for the mixer; index i covers (i - 100) / 100
+        self._pwm_lut = array.array('h', (
+            self._pwm_table[abs(i - 100)] for i in range(201)
+        ))
+
+        # Compile the mixing kernel now rather than on the first command
+        _mix_drive(0.0, 0.0, self._dead_zone, self._pwm_lut, False)
+        self.logger.info("Drive mixer: %s", "Numba" if NUMBA_AVAILABLE else "pure Python (numba not installed)")
+
+        # Joystick results memoized per 0.02 step of each axis: 101 x 101
+        # entries cover the whole plane, so held positions skip the mixer
+        self._mix_joystick = lru_cache(maxsize=101 * 101)(self._compute_joystick)
 
         if GPIO_AVAILABLE:
             self._initialize_gpio()
@@ -54,14 +225,18 @@ class CarController:
 
             # Setup PWM pins if configured
             if config.MOTOR_A_ENABLE is not None:
-                GPIO.setup(config.MOTOR_A_ENABLE, GPIO.OUT)
-                self.pwm_a = GPIO.PWM(config.MOTOR_A_ENABLE, config.PWM_FREQUENCY)
-                self.pwm_a.start(0)
+                self.pwm_a = self._create_pwm(config.MOTOR_A_ENABLE, config.MOTOR_A_PWM_CHANNEL)
 
             if config.MOTOR_B_ENABLE is not None:
-                GPIO.setup(config.MOTOR_B_ENABLE, GPIO.OUT)
-                self.pwm_b = GPIO.PWM(config.MOTOR_B_ENABLE, config.PWM_FREQUENCY)
-                self.pwm_b.start(0)
+                self.pwm_b = self._create_pwm(config.MOTOR_B_ENABLE, config.MOTOR_B_PWM_CHANNEL)
+
+            # Inversion is folded into the level tables once, here
+            self._a_levels = self._build_levels(self._a_inv)
+            self._b_levels = self._build_levels(self._b_inv)
+
+            # Switch to direct register writes for the direction pins
+            if config.GPIO_USE_MMAP:
+                self._map_gpio_registers()
 
             # Initialize motors to stopped state
             self.stop()
@@ -73,6 +248,98 @@ class CarController:
             self.logger.error(f"Failed to initialize GPIO: {e}")
             raise
 
+    def _create_pwm(self, pin: int, channel: int):
+        """
+        Create a started PWM output for an enable pin
+
+        Prefers the hardware PWM channel when USE_HARDWARE_PWM is set and
+        falls back to RPi.GPIO software PWM on the pin otherwise.
+        """
+        if config.USE_HARDWARE_PWM:
+            try:
+                pwm = _SysfsPWM(config.HARDWARE_PWM_CHIP, channel, config.PWM_FREQUENCY)
+                pwm.start(0)
+                self.logger.info(f"GPIO {pin}: hardware PWM (pwmchip{config.HARDWARE_PWM_CHIP}/pwm{channel})")
+                return pwm
+            except OSError as e:
+                self.logger.warning(f"Hardware PWM unavailable for GPIO {pin}, using software PWM: {e}")
+
+        # The pin stays in its PWM alt function in hardware mode, so it is
+        # only claimed as a plain output here
+        GPIO.setup(pin, GPIO.OUT)
+        pwm = GPIO.PWM(pin, config.PWM_FREQUENCY)
+        pwm.start(0)
+        return pwm
+
+    def _map_gpio_registers(self):
+        """
+        Map the GPIO register page so direction changes become two stores
+
+        Leaves self._gpio_mem as None (RPi.GPIO fallback) if the SoC isn't
+        BCM2835-family or /dev/gpiomem can't be mapped.
+        """
+        try:
+            with open("/proc/device-tree/compatible", "rb") as f:
+                compatible = f.read()
+            if not any(soc in compatible for soc in BCM2835_FAMILY):
+                self.logger.info("GPIO register layout not BCM2835 - using RPi.GPIO")
+                return
+
+            fd = os.open("/dev/gpiomem", os.O_RDWR | os.O_SYNC)
+            try:
+                self._gpio_mem = mmap.mmap(fd, 4096, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            self.logger.warning(f"Could not map /dev/gpiomem, using RPi.GPIO: {e}")
+            return
+
+        # Word-sized view: a register store is one subscript assignment,
+        # with no struct format parsing per write
+        self._gpio_regs = memoryview(self._gpio_mem).cast('I')
+
+        # Inversion is folded in here so the hot path has no branches
+        self._a_actions = self._build_actions(
+            self._a_pin1, self._a_pin2, self._a_inv
+        )
+        self._b_actions = self._build_actions(
+            self._b_pin1, self._b_pin2, self._b_inv
+        )
+        self.logger.info("GPIO registers mapped via /dev/gpiomem")
+
+    @staticmethod
+    def _build_levels(inverted: bool) -> Tuple[Tuple[int, int], ...]:
+        """
+        Precompute RPi.GPIO output levels for one motor
+
+        Returns:
+            (backward, stop, forward) tuples of (PIN1, PIN2) levels,
+            indexed by direction + 1
+        """
+        forward = (GPIO.HIGH, GPIO.LOW)
+        backward = (GPIO.LOW, GPIO.HIGH)
+        stop = (GPIO.LOW, GPIO.LOW)
+        if inverted:
+            forward, backward = backward, forward
+        return (backward, stop, forward)
+
+    @staticmethod
+    def _build_actions(pin1: int, pin2: int, inverted: bool) -> Tuple[Tuple[int, int], ...]:
+        """
+        Precompute register masks for one motor
+
+        Returns:
+            (backward, stop, forward) tuples of (set_mask, clr_mask),
+            indexed by direction + 1
+        """
+        bit1, bit2 = 1 << pin1, 1 << pin2
+        forward = (bit1, bit2)   # PIN1 high, PIN2 low
+        backward = (bit2, bit1)  # PIN1 low, PIN2 high
+        stop = (0, bit1 | bit2)  # both low
+        if inverted:
+            forward, backward = backward, forward
+        return (backward, stop, forward)
+
     def _set_motor_a(self, direction: int, speed: int):
         """
         Set Motor A direction and speed
@@ -81,26 +348,25 @@ class CarController:
             direction: 1 (forward), -1 (backward), 0 (stop)
             speed: 0-100 PWM duty cycle
         """
+        duty = speed if direction else 0
+        self._a_state = (direction, duty)
         if not GPIO_AVAILABLE:
             return
 
-        # Apply inversion if configured
-        if config.MOTOR_A_INVERTED:
-            direction = -direction
-
-        if direction == 1:  # Forward
-            GPIO.output(config.MOTOR_A_PIN1, GPIO.HIGH)
-            GPIO.output(config.MOTOR_A_PIN2, GPIO.LOW)
-        elif direction == -1:  # Backward
-            GPIO.output(config.MOTOR_A_PIN1, GPIO.LOW)
-            GPIO.output(config.MOTOR_A_PIN2, GPIO.HIGH)
-        else:  # Stop
-            GPIO.output(config.MOTOR_A_PIN1, GPIO.LOW)
-            GPIO.output(config.MOTOR_A_PIN2, GPIO.LOW)
+        regs = self._gpio_regs
+        if regs is not None:
+            # Clear then set: two register stores, inversion precomputed
+            set_mask, clr_mask = self._a_actions[direction + 1]
+            regs[GPCLR0_WORD] = clr_mask
+            regs[GPSET0_WORD] = set_mask
+        else:
+            # Both pins in one call, levels per direction precomputed
+            GPIO.output(self._a_pins, self._a_levels[direction + 1])
 
-        # Set speed via PWM if available
-        if self.pwm_a is not None:
-            self.pwm_a.ChangeDutyCycle(speed if direction != 0 else 0)
+        # Set speed via PWM if available, skipping unchanged duty cycles
+        if duty != self._last_duty_a and self.pwm_a is not None:
+            self.pwm_a.ChangeDutyCycle(duty)
+            self._last_duty_a = duty
 
     def _set_motor_b(self, direction: int, speed: int):
         """
@@ -110,26 +376,25 @@ class CarController:
             direction: 1 (forward), -1 (backward), 0 (stop)
             speed: 0-100 PWM duty cycle
         """
+        duty = speed if direction else 0
+        self._b_state = (direction, duty)
         if not GPIO_AVAILABLE:
             return
 
-        # Apply inversion if configured
-        if config.MOTOR_B_INVERTED:
-            direction = -direction
-
-        if direction == 1:  # Forward
-            GPIO.output(config.MOTOR_B_PIN1, GPIO.HIGH)
-            GPIO.output(config.MOTOR_B_PIN2, GPIO.LOW)
-        elif direction == -1:  # Backward
-            GPIO.output(config.MOTOR_B_PIN1, GPIO.LOW)
-            GPIO.output(config.MOTOR_B_PIN2, GPIO.HIGH)
-        else:  # Stop
-            GPIO.output(config.MOTOR_B_PIN1, GPIO.LOW)
-            GPIO.output(config.MOTOR_B_PIN2, GPIO.LOW)
+        regs = self._gpio_regs
+        if regs is not None:
+            # Clear then set: two register stores, inversion precomputed
+            set_mask, clr_mask = self._b_actions[direction + 1]
+            regs[GPCLR0_WORD] = clr_mask
+            regs[GPSET0_WORD] = set_mask
+        else:
+            # Both pins in one call, levels per direction precomputed
+            GPIO.output(self._b_pins, self._b_levels[direction + 1])
 
-        # Set speed via PWM if available
-        if self.pwm_b is not None:
-            self.pwm_b.ChangeDutyCycle(speed if direction != 0 else 0)
+        # Set speed via PWM if available, skipping unchanged duty cycles
+        if duty != self._last_duty_b and self.pwm_b is not None:
+            self.pwm_b.ChangeDutyCycle(duty)
+            self._last_duty_b = duty
 
     def process_joystick_input(self, x: float, y: float):
         """
@@ -139,54 +404,30 @@ class CarController:
             x: Horizontal axis (-1.0 to 1.0), negative = left, positive = right
             y: Vertical axis (-1.0 to 1.0), negative = backward, positive = forward
         """
-        self.last_command_time = time.time()
+        now = _mono()
+        self.last_command_time = now
 
-        # Clamp values to valid range
-        x = max(-1.0, min(1.0, x))
-        y = max(-1.0, min(1.0, y))
-
-        # Apply axis-specific dead zones to avoid unintended drift
-        if abs(x) < config.JOYSTICK_DEAD_ZONE:
-            x = 0.0
-        if abs(y) < config.JOYSTICK_DEAD_ZONE:
-            y = 0.0
-
-        if x == 0.0 and y == 0.0:
+        # Calculate motor speeds using differential drive, looked up by
+        # the axes quantized to 0.02 steps
+        left_direction, left_pwm, right_direction, right_pwm = self._mix_joystick(
+            max(-50, min(50, round(x * 50))), max(-50, min(50, round(y * 50)))
+        )
+        if not left_direction and not right_direction:
             self.stop()
             return
-
-        # Calculate motor speeds using differential drive
-        # Base speed from y-axis (forward/backward)
-        left_speed = y
-        right_speed = y
-
-        # Add turning component from x-axis
-        # Positive x (right) reduces left motor and increases right motor
-        # Negative x (left) reduces right motor and increases left motor
-        left_speed -= x
-        right_speed += x
-
-        # Clamp to -1.0 to 1.0
-        left_speed = max(-1.0, min(1.0, left_speed))
-        right_speed = max(-1.0, min(1.0, right_speed))
-
-        # Convert to direction and PWM values
-        left_direction = 1 if left_speed > 0 else (-1 if left_speed < 0 else 0)
-        right_direction = 1 if right_speed > 0 else (-1 if right_speed < 0 else 0)
-
-        # Map to configured speed range
-        left_pwm = self._map_speed(abs(left_speed))
-        right_pwm = self._map_speed(abs(right_speed))
+        if self._is_redundant(left_direction, left_pwm, right_direction, right_pwm, now):
+            return
 
         # Set motors
         self._set_motor_a(left_direction, left_pwm)
         self._set_motor_b(right_direction, right_pwm)
+        self._applied_at = now
 
-        # Log command in debug mode
-        if config.DEBUG:
-            self.logger.debug(
-                f"Joystick: ({x:.2f}, {y:.2f}) -> "
-                f"Left: {left_direction}@{left_pwm}%, Right: {right_direction}@{right_pwm}%"
+        # Log command in debug mode (skips formatting entirely otherwise)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._logger_debug(
+                "Joystick: (%.2f, %.2f) -> Left: %d@%d%%, Right: %d@%d%%",
+                x, y, left_direction, left_pwm, right_direction, right_pwm
             )
 
     def process_dual_input(self, left: float, right: float):
@@ -197,99 +438,99 @@ class CarController:
             left: -1.0 (full reverse) to 1.0 (full forward) for left motor
             right: -1.0 (full reverse) to 1.0 (full forward) for right motor
         """
-        self.last_command_time = time.time()
+        now = _mono()
+        self.last_command_time = now
 
-        left = max(-1.0, min(1.0, left))
-        right = max(-1.0, min(1.0, right))
-
-        if abs(left) < config.JOYSTICK_DEAD_ZONE:
-            left = 0.0
-        if abs(right) < config.JOYSTICK_DEAD_ZONE:
-            right = 0.0
-
-        if left == 0.0 and right == 0.0:
+        # float() keeps the Numba kernel on its single compiled signature;
+        # an int argument would trigger a fresh compile on the control path
+        left_direction, left_pwm, right_direction, right_pwm = _mix_drive(
+            float(left), float(right), self._dead_zone, self._pwm_lut, True
+        )
+        if not left_direction and not right_direction:
             self.stop()
             return
-
-        left_direction = 1 if left > 0 else (-1 if left < 0 else 0)
-        right_direction = 1 if right > 0 else (-1 if right < 0 else 0)
-
-        left_pwm = self._map_speed(abs(left))
-        right_pwm = self._map_speed(abs(right))
+        if self._is_redundant(left_direction, left_pwm, right_direction, right_pwm, now):
+            return
 
         self._set_motor_a(left_direction, left_pwm)
         self._set_motor_b(right_direction, right_pwm)
+        self._applied_at = now
 
         # Always log for debugging motor switching issue
-        self.logger.info(
-            f"⚡ MOTORS: A(left)={left_direction:+d}@{left_pwm}%, "
-            f"B(right)={right_direction:+d}@{right_pwm}%"
-        )
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(
+                "⚡ MOTORS: A(left)=%+d@%d%%, B(right)=%+d@%d%%",
+                left_direction, left_pwm, right_direction, right_pwm
+            )
 
-    def _map_speed(self, normalized_speed: float) -> int:
+    def _compute_joystick(self, ix: int, iy: int) -> Tuple[int, int, int, int]:
         """
-        Map normalized speed (0.0-1.0) to PWM duty cycle
-
-        Args:
-            normalized_speed: Speed value from 0.0 to 1.0
+        Mix quantized joystick axes (-50 to 50, in 0.02 steps) into
+        (left_dir, left_pwm, right_dir, right_pwm); memoized in __init__
+        """
+        return _mix_drive(ix / 50, iy / 50, self._dead_zone, self._pwm_lut, False)
 
-        Returns:
-            PWM duty cycle value (MIN_MOTOR_SPEED to MAX_MOTOR_SPEED)
+    def _is_redundant(self, left_dir: int, left_pwm: int, right_dir: int, right_pwm: int, now: int) -> bool:
         """
-        if normalized_speed < config.JOYSTICK_DEAD_ZONE:
-            return 0
+        Check whether a mixed command is a near-duplicate of the motor state
 
-        # Map to configured speed range
-        speed_range = config.MAX_MOTOR_SPEED - config.MIN_MOTOR_SPEED
-        return int(config.MIN_MOTOR_SPEED + (normalized_speed * speed_range))
+        Only commands keeping both directions and moving each duty by less
+        than half the dead zone's worth, shortly after the last applied one,
+        count; stops are never passed in here.
+        """
+        a_dir, a_duty = self._a_state
+        b_dir, b_duty = self._b_state
+        return (now - self._applied_at < self._coalesce_window_ns
+                and left_dir == a_dir and right_dir == b_dir
+                and abs((left_pwm if left_dir else 0) - a_duty) < self._coalesce_pwm_delta
+                and abs((right_pwm if right_dir else 0) - b_duty) < self._coalesce_pwm_delta)
 
     def stop(self):
         """Stop all motors"""
         self._set_motor_a(0, 0)
         self._set_motor_b(0, 0)
-        if config.DEBUG:
-            self.logger.debug("Motors stopped")
+        self._logger_debug("Motors stopped")
 
     def forward(self, speed: int = None):
         """Move forward at specified speed"""
         speed = speed or config.DEFAULT_SPEED
         self._set_motor_a(1, speed)
         self._set_motor_b(1, speed)
-        self.logger.debug(f"Moving forward at {speed}%")
+        self.logger.debug("Moving forward at %d%%", speed)
 
     def backward(self, speed: int = None):
         """Move backward at specified speed"""
         speed = speed or config.DEFAULT_SPEED
         self._set_motor_a(-1, speed)
         self._set_motor_b(-1, speed)
-        self.logger.debug(f"Moving backward at {speed}%")
+        self.logger.debug("Moving backward at %d%%", speed)
 
     def turn_left(self, speed: int = None):
         """Turn left (left motor backward, right motor forward)"""
         speed = speed or config.DEFAULT_SPEED
         self._set_motor_a(-1, speed)
         self._set_motor_b(1, speed)
-        self.logger.debug(f"Turning left at {speed}%")
+        self.logger.debug("Turning left at %d%%", speed)
 
     def turn_right(self, speed: int = None):
         """Turn right (left motor forward, right motor backward)"""
         speed = speed or config.DEFAULT_SPEED
         self._set_motor_a(1, speed)
         self._set_motor_b(-1, speed)
-        self.logger.debug(f"Turning right at {speed}%")
+        self.logger.debug("Turning right at %d%%", speed)
 
     def check_watchdog(self):
         """
         Check if too much time has elapsed since last command
         Auto-stop motors if timeout exceeded
         """
-        if not config.ENABLE_WATCHDOG:
+        if not self._watchdog_enabled:
             return
 
-        elapsed = time.time() - self.last_command_time
-        if elapsed > config.AUTO_STOP_TIMEOUT:
+        elapsed_ns = _mono() - self.last_command_time
+        if elapsed_ns > self._auto_stop_timeout_ns:
             self.stop()
-            self.logger.warning(f"Watchdog timeout ({elapsed:.1f}s) - motors stopped")
+            self.logger.warning("Watchdog timeout (%.1fs) - motors stopped", elapsed_ns / 1e9)
 
     def cleanup(self):
         """Clean up GPIO resources"""
@@ -299,6 +540,12 @@ class CarController:
                 self.pwm_a.stop()
             if self.pwm_b:
                 self.pwm_b.stop()
+            if self._gpio_mem is not None:
+                # The view must be released before the mapping can close
+                self._gpio_regs.release()
+                self._gpio_regs = None
+                self._gpio_mem.close()
+                self._gpio_mem = None
             GPIO.cleanup()
             self.logger.info("GPIO cleaned up")
 
@@ -13,6 +13,11 @@ SERVER_HOST = "0.0.0.0"
 # Server port
 SERVER_PORT = 5000
 
+# Port for the dedicated MJPEG server. Video is served from its own thread
+# and event loop so frame writes never delay control messages; GET /video
+# on SERVER_PORT redirects here. None serves video from SERVER_PORT directly.
+VIDEO_SERVER_PORT = 5001
+
 # CORS allowed origins (set to "*" for development, restrict in production)
 CORS_ALLOWED_ORIGINS = "*"
 
@@ -35,6 +40,20 @@ MOTOR_B_ENABLE = 13  # GPIO 13 (PWM1)
 # PWM frequency in Hz (if using PWM)
 PWM_FREQUENCY = 1000
 
+# Generate the enable-pin PWM in hardware via /sys/class/pwm instead of
+# RPi.GPIO's software PWM thread. Needs this line in /boot/config.txt:
+#   dtoverlay=pwm-2chan,pin=12,func=4,pin2=13,func2=4
+# Falls back to software PWM if the PWM chip isn't available.
+USE_HARDWARE_PWM = True
+HARDWARE_PWM_CHIP = 0
+MOTOR_A_PWM_CHANNEL = 0  # GPIO 12 -> PWM0
+MOTOR_B_PWM_CHANNEL = 1  # GPIO 13 -> PWM1
+
+# Drive the direction pins by writing the GPIO set/clear registers through
+# /dev/gpiomem instead of per-pin RPi.GPIO calls. Only used on BCM2835-family
+# SoCs (Pi Zero to Pi 4); falls back to RPi.GPIO elsewhere or on failure.
+GPIO_USE_MMAP = True
+
 # Default motor speed (0-100, only used if PWM is enabled)
 DEFAULT_SPEED = 70
 
@@ -51,6 +70,16 @@ MOTOR_B_INVERTED = False
 # Values below this threshold (near center) will stop motors
 JOYSTICK_DEAD_ZONE = 0.15
 
+# Drive commands arriving within this many seconds of the last applied one
+# are dropped if both motors keep their direction and their duty changes by
+# less than half the dead zone's worth (stops are always applied)
+COMMAND_COALESCE_WINDOW = 0.02
+
+# Joystick commands are buffered for this many seconds and only the newest
+# is applied, so a burst queued during a Wi-Fi stall drives the motors once.
+# 0 applies every command immediately.
+CONTROL_DEBOUNCE_DELAY = 0.005
+
 # Motor speed mapping
 # These values determine how joystick input maps to motor speed
 MIN_MOTOR_SPEED = 40   # Minimum speed to overcome motor resistance
@@ -66,7 +95,13 @@ CAMERA_RESOLUTION = (640, 480)
 # Camera frame rate (fps)
 CAMERA_FRAMERATE = 20
 
+# Low-resolution preview stream scaled by the ISP, served at /video?quality=low
+# (requires libjpeg-turbo; set to None to disable)
+CAMERA_LORES_RESOLUTION = (320, 240)
+
 # JPEG quality for MJPEG stream (0-100, higher = better quality, more bandwidth)
+# The hardware encoder is bitrate-controlled, so there it is mapped onto
+# picamera2's five quality levels (80 = HIGH)
 JPEG_QUALITY = 80
 
 # Camera rotation (0, 90, 180, 270) - adjust if camera is mounted upside down
@@ -76,6 +111,38 @@ CAMERA_ROTATION = 0
 CAMERA_HFLIP = False  # Horizontal flip
 CAMERA_VFLIP = False  # Vertical flip
 
+# JPEG encoder pipeline:
+#   "hardware"  - V4L2 hardware MJPEG encoder (Pi 4 and earlier), falls back
+#                 to "picamera2" if the hardware codec is unavailable
+#   "picamera2" - picamera2's JpegEncoder fed XBGR8888 straight from the ISP
+#   "software"  - capture frames and encode them in the capture thread
+CAMERA_ENCODER = "hardware"
+
+# Worker threads encoding JPEGs in the "software" pipeline (also the number
+# of frames allowed in flight, so capture and encode overlap)
+JPEG_ENCODE_THREADS = 2
+
+# Pin the "software" pipeline's capture thread to this CPU core (None = let
+# the scheduler decide). Keeps frame pacing steady while the server handles
+# requests; the encode workers still run on every core.
+CAMERA_THREAD_CPU = 3
+
+# Real-time (SCHED_FIFO) priority for that capture thread, 1-99. Requires
+# root or CAP_SYS_NICE; falls back to nice -5 when not permitted.
+# None disables.
+CAMERA_THREAD_PRIORITY = None
+
+# CPU core for the server's main (event loop) thread, which handles control
+# commands. Kept off the capture thread's core. None leaves it to the kernel.
+SERVER_THREAD_CPU = 2
+
+# SCHED_FIFO priority for the server's main thread, 1-99 (e.g. 50). Requires
+# root or CAP_SYS_NICE; falls back to nice -10 when not permitted.
+# None disables. This thread also serves video if the video server can't
+# start, and a busy FIFO thread starves everything else on its core,
+# including the kernel's network processing.
+SERVER_THREAD_PRIORITY = None
+
 # ============================================================================
 # Server Behavior
 # ============================================================================
@@ -108,3 +175,8 @@ AUTO_STOP_TIMEOUT = 2.0
 
 # Enable watchdog timer for safety
 ENABLE_WATCHDOG = True
+
+# Grace period (seconds) before stopping the motors after a client
+# disconnects; a reconnect from the same address within it cancels the
+# stop. 0 stops immediately.
+DISCONNECT_STOP_DELAY = 0.3
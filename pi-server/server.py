@@ -5,16 +5,24 @@ Provides WebSocket control interface and MJPEG video streaming
 """
 
 import logging
+import os
 import signal
 import sys
-import json
-from threading import Thread, Timer
-from flask import Flask, Response, render_template_string, jsonify
+from threading import Event, Thread
+import eventlet
+import eventlet.wsgi
+from flask import Flask, Response, jsonify, request, redirect
 from flask_socketio import SocketIO, emit
 import config
 from car_controller import CarController
 from camera_stream import CameraStream
 
+# Prefer orjson's C parser for string payloads when installed
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 
 # Configure logging
 logging.basicConfig(
@@ -41,10 +49,26 @@ socketio = SocketIO(
 car = None
 camera = None
 
+# Controller methods bound once it exists, so handlers skip the lookups
+_process_joystick = None
+_process_dual = None
+_stop = None
+
+# Deferred stops scheduled by disconnects, keyed by the client's address so
+# only that client reconnecting (with a new session id) cancels its stop
+_pending_stops = {}
+
+# Newest buffered joystick command and whether a task will apply it
+_latest_xy = None
+_apply_scheduled = False
+
+# Whether the dedicated video server is accepting connections
+_video_server_running = False
+
 
 def initialize_hardware():
     """Initialize car controller and camera"""
-    global car, camera
+    global car, camera, _process_joystick, _process_dual, _stop
 
     logger.info("Starting Pi Car Server...")
 
@@ -60,6 +84,9 @@ def initialize_hardware():
         # Initialize car controller
         logger.info("Initializing car controller...")
         car = CarController()
+        _process_joystick = car.process_joystick_input
+        _process_dual = car.process_dual_input
+        _stop = car.stop
         if car.is_initialized:
             logger.info("✓ Car controller initialized successfully")
         else:
@@ -87,11 +114,37 @@ def cleanup_hardware():
 
 def watchdog_timer():
     """Periodic watchdog check to auto-stop motors if no commands received"""
-    if car and config.ENABLE_WATCHDOG:
-        car.check_watchdog()
+    # Runs as a single background task on the Socket.IO event loop
+    while True:
+        socketio.sleep(1.0)
+        if car:
+            car.check_watchdog()
+
 
-    # Schedule next check
-    Timer(1.0, watchdog_timer).start()
+def tune_server_thread():
+    """
+    Pin the main thread to its CPU and raise its scheduling priority
+
+    Called from main() after the hardware threads have started, so only the
+    event loop thread (pid 0 = calling thread) is affected.
+    """
+    if config.SERVER_THREAD_CPU is not None and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, {config.SERVER_THREAD_CPU})
+            logger.info("Server thread pinned to CPU %d", config.SERVER_THREAD_CPU)
+        except OSError as e:
+            logger.warning("Could not pin server thread to CPU %d: %s", config.SERVER_THREAD_CPU, e)
+
+    if config.SERVER_THREAD_PRIORITY is not None:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(config.SERVER_THREAD_PRIORITY))
+            logger.info("Server thread running SCHED_FIFO priority %d", config.SERVER_THREAD_PRIORITY)
+        except (AttributeError, OSError) as e:
+            logger.warning("SCHED_FIFO not permitted (%s), trying nice -10", e)
+            try:
+                os.nice(-10)
+            except OSError as e:
+                logger.warning("Could not raise server thread priority: %s", e)
 
 
 # Signal handler for graceful shutdown
@@ -110,120 +163,193 @@ signal.signal(signal.SIGTERM, signal_handler)
 # HTTP Routes
 # ============================================================================
 
+# Status page markup; the {{ }} fields are filled in by _render_status_page
+STATUS_PAGE_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Pi Car Server</title>
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            max-width: 800px;
+            margin: 50px auto;
+            padding: 20px;
+            background: #f5f5f5;
+        }
+        .container {
+            background: white;
+            padding: 30px;
+            border-radius: 10px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+        }
+        h1 { color: #333; }
+        .status {
+            padding: 10px;
+            margin: 10px 0;
+            border-radius: 5px;
+        }
+        .status.ok {
+            background: #d4edda;
+            color: #155724;
+        }
+        .status.warning {
+            background: #fff3cd;
+            color: #856404;
+        }
+        .endpoint {
+            background: #e9ecef;
+            padding: 10px;
+            margin: 5px 0;
+            border-radius: 5px;
+            font-family: monospace;
+        }
+        .video-preview {
+            margin: 20px 0;
+            border: 2px solid #ddd;
+            border-radius: 5px;
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>🚗 Pi Car Server</h1>
+
+        <h2>Status</h2>
+        <div class="status {{ camera_status }}">
+            Camera: {{ camera_message }}
+        </div>
+        <div class="status {{ controller_status }}">
+            Controller: {{ controller_message }}
+        </div>
+
+        <h2>Video Stream</h2>
+        <img src="/video" class="video-preview" width="640" height="480" alt="Video Stream">
+
+        <h2>API Endpoints</h2>
+        <div class="endpoint">GET /</div>
+        <p>This status page</p>
+
+        <div class="endpoint">GET /video</div>
+        <p>MJPEG video stream</p>
+
+        <div class="endpoint">GET /video?quality=low</div>
+        <p>Low-resolution MJPEG preview stream</p>
+
+        <div class="endpoint">GET /health</div>
+        <p>Health check endpoint</p>
+
+        <div class="endpoint">WebSocket /socket.io/</div>
+        <p>Control command interface</p>
+
+        <h2>WebSocket Protocol</h2>
+        <p>Send control commands as JSON:</p>
+        <div class="endpoint">
+            {"type": "control", "x": 0.5, "y": 0.8}
+        </div>
+        <p>x: -1.0 (left) to 1.0 (right)</p>
+        <p>y: -1.0 (backward) to 1.0 (forward)</p>
+    </div>
+</body>
+</html>
+"""
+
+
+def _render_status_page(camera_ok: bool, controller_ok: bool) -> bytes:
+    """Fill in the status page for one camera/controller state"""
+    fields = {
+        'camera_status': 'ok' if camera_ok else 'warning',
+        'camera_message': 'Online' if camera_ok else 'Offline (simulation mode)',
+        'controller_status': 'ok' if controller_ok else 'warning',
+        'controller_message': 'Online' if controller_ok else 'Offline (simulation mode)',
+    }
+    page = STATUS_PAGE_TEMPLATE
+    for name, value in fields.items():
+        page = page.replace('{{ %s }}' % name, value)
+    return page.encode('utf-8')
+
+
+# Every camera/controller state combination, rendered once at import
+_STATUS_PAGES = {
+    (camera_ok, controller_ok): _render_status_page(camera_ok, controller_ok)
+    for camera_ok in (False, True)
+    for controller_ok in (False, True)
+}
+
+
 @app.route('/')
 def index():
     """Server status page"""
-    status_page = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Pi Car Server</title>
-        <style>
-            body {
-                font-family: Arial, sans-serif;
-                max-width: 800px;
-                margin: 50px auto;
-                padding: 20px;
-                background: #f5f5f5;
-            }
-            .container {
-                background: white;
-                padding: 30px;
-                border-radius: 10px;
-                box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            }
-            h1 { color: #333; }
-            .status {
-                padding: 10px;
-                margin: 10px 0;
-                border-radius: 5px;
-            }
-            .status.ok {
-                background: #d4edda;
-                color: #155724;
-            }
-            .status.warning {
-                background: #fff3cd;
-                color: #856404;
-            }
-            .endpoint {
-                background: #e9ecef;
-                padding: 10px;
-                margin: 5px 0;
-                border-radius: 5px;
-                font-family: monospace;
-            }
-            .video-preview {
-                margin: 20px 0;
-                border: 2px solid #ddd;
-                border-radius: 5px;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>🚗 Pi Car Server</h1>
-
-            <h2>Status</h2>
-            <div class="status {{ camera_status }}">
-                Camera: {{ camera_message }}
-            </div>
-            <div class="status {{ controller_status }}">
-                Controller: {{ controller_message }}
-            </div>
-
-            <h2>Video Stream</h2>
-            <img src="/video" class="video-preview" width="640" height="480" alt="Video Stream">
-
-            <h2>API Endpoints</h2>
-            <div class="endpoint">GET /</div>
-            <p>This status page</p>
-
-            <div class="endpoint">GET /video</div>
-            <p>MJPEG video stream</p>
-
-            <div class="endpoint">GET /health</div>
-            <p>Health check endpoint</p>
-
-            <div class="endpoint">WebSocket /socket.io/</div>
-            <p>Control command interface</p>
-
-            <h2>WebSocket Protocol</h2>
-            <p>Send control commands as JSON:</p>
-            <div class="endpoint">
-                {"type": "control", "x": 0.5, "y": 0.8}
-            </div>
-            <p>x: -1.0 (left) to 1.0 (right)</p>
-            <p>y: -1.0 (backward) to 1.0 (forward)</p>
-        </div>
-    </body>
-    </html>
-    """
+    camera_ok = bool(camera and camera.is_initialized)
+    controller_ok = bool(car and car.is_initialized)
 
-    camera_ok = camera and camera.is_initialized
-    controller_ok = car and car.is_initialized
-
-    return render_template_string(
-        status_page,
-        camera_status='ok' if camera_ok else 'warning',
-        camera_message='Online' if camera_ok else 'Offline (simulation mode)',
-        controller_status='ok' if controller_ok else 'warning',
-        controller_message='Online' if controller_ok else 'Offline (simulation mode)'
-    )
+    return Response(_STATUS_PAGES[(camera_ok, controller_ok)], mimetype='text/html')
 
 
 @app.route('/video')
 def video():
-    """MJPEG video stream endpoint"""
+    """MJPEG video stream endpoint (?quality=low for the low-res preview)"""
+    if _video_server_running:
+        # Every video client shares the dedicated server's event loop.
+        # Strip the port from the Host header, keeping IPv6 brackets.
+        host = request.host
+        if not host.endswith(']'):
+            host = host.rpartition(':')[0] or host
+        return redirect(
+            f"http://{host}:{config.VIDEO_SERVER_PORT}{request.full_path.rstrip('?')}",
+            code=307
+        )
+    return stream_video()
+
+
+def stream_video():
+    """Serve the MJPEG stream for the current request"""
     if not camera:
         return "Camera not initialized", 503
 
+    stream = 'lores' if request.args.get('quality') == 'low' else 'main'
+
     return Response(
-        camera.generate_frames(),
+        camera.generate_frames(stream),
         mimetype='multipart/x-mixed-replace; boundary=frame'
     )
 
 
+# Minimal app for the dedicated video server (VIDEO_SERVER_PORT)
+video_app = Flask('picar_video')
+video_app.add_url_rule('/video', 'video', stream_video)
+
+
+def run_video_server(ready):
+    """Serve video_app on VIDEO_SERVER_PORT with this thread's own eventlet hub"""
+    global _video_server_running
+    try:
+        sock = eventlet.listen((config.SERVER_HOST, config.VIDEO_SERVER_PORT))
+        _video_server_running = True
+        ready.set()
+        eventlet.wsgi.server(sock, video_app, log_output=False)
+    except Exception as e:
+        logger.error(f"Video server error: {e}")
+    finally:
+        # /video goes back to serving the stream itself
+        _video_server_running = False
+        ready.set()
+
+
+def start_video_server():
+    """Start the dedicated video server in its own OS thread"""
+    ready = Event()
+    thread = Thread(target=run_video_server, args=(ready,), name='video-server', daemon=True)
+    thread.start()
+
+    # Wait for the bind so /video only redirects to a live listener
+    ready.wait(timeout=5.0)
+    if _video_server_running:
+        logger.info(f"Video server listening on {config.SERVER_HOST}:{config.VIDEO_SERVER_PORT}")
+    else:
+        logger.warning(f"Video server not running - serving video on port {config.SERVER_PORT}")
+
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
@@ -241,6 +367,12 @@ def health():
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
+    # A quick reconnect from the same client keeps driving instead of
+    # jerking to a stop
+    pending = _pending_stops.pop(request.remote_addr, None)
+    if pending is not None:
+        pending.cancel()
+
     logger.info(f"Client connected")
     emit('status', {
         'type': 'status',
@@ -253,10 +385,46 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
+    global _latest_xy
     logger.info("Client disconnected")
-    # Stop motors when client disconnects for safety
-    if car:
-        car.stop()
+    # Drop any buffered joystick command so it can't restart the motors
+    _latest_xy = None
+    # Stop motors when client disconnects for safety, after a short grace
+    # period so a brief Wi-Fi drop doesn't cause a stop-then-resume jerk
+    if _stop:
+        if config.DISCONNECT_STOP_DELAY > 0:
+            addr = request.remote_addr
+            pending = _pending_stops.pop(addr, None)
+            if pending is not None:
+                pending.cancel()
+            _pending_stops[addr] = eventlet.spawn_after(
+                config.DISCONNECT_STOP_DELAY, deferred_stop, addr
+            )
+        else:
+            _stop()
+
+
+def deferred_stop(addr):
+    """Stop the motors once a disconnected client's grace period expires"""
+    _pending_stops.pop(addr, None)
+    _stop()
+
+
+def apply_latest_joystick():
+    """Apply the newest buffered joystick command after the debounce delay"""
+    global _apply_scheduled
+    socketio.sleep(config.CONTROL_DEBOUNCE_DELAY)
+    # Cleared before applying so a command arriving from here on schedules
+    # a fresh task instead of being lost
+    _apply_scheduled = False
+    # Cleared by a disconnect or a dual command while this task slept
+    if _latest_xy is None:
+        return
+    x, y = _latest_xy
+    try:
+        _process_joystick(x, y)
+    except Exception as e:
+        logger.error(f"Error applying control command: {e}")
 
 
 @socketio.on('control')
@@ -271,41 +439,61 @@ def handle_control(data):
         "y": float (-1.0 to 1.0)
     }
     """
+    global _latest_xy, _apply_scheduled
     try:
         # Parse command
         if isinstance(data, str):
-            data = json.loads(data)
+            data = json_loads(data)
 
         command_type = data.get('type', 'control')
 
         if command_type == 'dual':
-            if car:
-                left = float(data.get('left', 0))
-                right = float(data.get('right', 0))
+            if _process_dual:
+                try:
+                    left = float(data['left'])
+                    right = float(data['right'])
+                except KeyError:
+                    logger.warning("Dual command missing left/right values")
+                    return
+                # Applied now, so an older buffered joystick command must not
+                # override it
+                _latest_xy = None
                 # Always log dual control commands for debugging
-                logger.info(f"🎮 DUAL CONTROL: left={left:+.3f}, right={right:+.3f}")
-                car.process_dual_input(left, right)
+                logger.info("🎮 DUAL CONTROL: left=%+.3f, right=%+.3f", left, right)
+                _process_dual(left, right)
             else:
                 logger.warning("Car controller not available")
             return
         elif command_type != 'control':
-            logger.warning(f"Unknown command type: {command_type}")
+            logger.warning("Unknown command type: %s", command_type)
             return
 
         # Extract joystick coordinates
-        x = float(data.get('x', 0))
-        y = float(data.get('y', 0))
+        # Always floats: JSON integers (e.g. 1 for full throttle) would
+        # otherwise reach the motor controller as ints
+        try:
+            x = float(data['x'])
+            y = float(data['y'])
+        except KeyError:
+            logger.warning("Control command missing x/y coordinates")
+            return
 
         # Validate range
         if not (-1.0 <= x <= 1.0 and -1.0 <= y <= 1.0):
-            logger.warning(f"Invalid coordinate values: x={x}, y={y}")
+            logger.warning("Invalid coordinate values: x=%s, y=%s", x, y)
             return
 
-        # Control car
-        if car:
-            car.process_joystick_input(x, y)
+        # Control car: bursts are coalesced so only the latest command is applied
+        if _process_joystick:
+            if config.CONTROL_DEBOUNCE_DELAY > 0:
+                _latest_xy = (x, y)
+                if not _apply_scheduled:
+                    _apply_scheduled = True
+                    socketio.start_background_task(apply_latest_joystick)
+            else:
+                _process_joystick(x, y)
             if config.DEBUG:
-                logger.info(f"Control command received: x={x:.2f}, y={y:.2f}")
+                logger.info("Control command received: x=%.2f, y=%.2f", x, y)
         else:
             logger.warning("Car controller not available")
 
@@ -315,10 +503,8 @@ def handle_control(data):
         logger.error(f"Error processing control command: {e}")
 
 
-@socketio.on('message')
-def handle_message(data):
-    """Handle generic messages (redirect to control handler)"""
-    handle_control(data)
+# Generic messages are control commands too
+socketio.on_event('message', handle_control)
 
 
 @socketio.on('ping')
@@ -338,17 +524,26 @@ def main():
         logger.error("Failed to initialize hardware")
         sys.exit(1)
 
+    # Started before tuning so the video thread doesn't inherit the
+    # control path's CPU pinning and priority
+    if config.VIDEO_SERVER_PORT:
+        start_video_server()
+
+    # Dedicated core and priority for the control path
+    tune_server_thread()
+
     # Start watchdog timer if enabled
     if config.ENABLE_WATCHDOG:
         logger.info("Starting watchdog timer")
-        watchdog_timer()
+        socketio.start_background_task(watchdog_timer)
 
     # Display server information
     logger.info("=" * 60)
     logger.info("Pi Car Server Ready")
     logger.info("=" * 60)
     logger.info(f"Server running on {config.SERVER_HOST}:{config.SERVER_PORT}")
-    logger.info(f"Video stream: http://192.168.100.148:{config.SERVER_PORT}/video")
+    video_port = config.VIDEO_SERVER_PORT if _video_server_running else config.SERVER_PORT
+    logger.info(f"Video stream: http://192.168.100.148:{video_port}/video")
     logger.info(f"WebSocket: ws://192.168.100.148:{config.SERVER_PORT}/socket.io/")
     logger.info(f"Status page: http://192.168.100.148:{config.SERVER_PORT}/")
     logger.info("=" * 60)